@@ -9,6 +9,7 @@ Purpose:
 - Uses ensemble confidence from CSV
 """
 
+import numpy as np
 import pandas as pd
 import os
 
@@ -28,6 +29,7 @@ LOG_DIR = os.path.join(
 
 # Thresholds to evaluate
 THRESHOLDS = [0.2, 0.3, 0.4, 0.5, 0.6]
+THRESHOLD_ARR = np.asarray(THRESHOLDS, dtype=np.float64)
 
 # ===============================
 # AUTO-DETECT LOG FILE
@@ -49,45 +51,55 @@ LOG_FILE = os.path.join(LOG_DIR, sorted(candidates)[-1])
 print(f"\n📂 Using log file: {LOG_FILE}")
 
 # ===============================
-# LOAD LOG FILE
+# VERIFY LOG SCHEMA (header only)
 # ===============================
 
-df = pd.read_csv(LOG_FILE)
-print(f"✔ Total flows loaded: {len(df)}")
-
 required_columns = ["final_label", "confidence"]
 
+header = pd.read_csv(LOG_FILE, nrows=0).columns
+
 for col in required_columns:
-    if col not in df.columns:
+    if col not in header:
         raise ValueError(f"❌ Missing required column: {col}")
 
 print("✔ Required columns verified")
 
 # ===============================
-# THRESHOLD SIMULATION
+# THRESHOLD SIMULATION (streamed)
 # ===============================
 
+# Rows per chunk; only the two needed columns are parsed
+CHUNK_SIZE = 50_000
+
 print("\n🧪 Starting threshold simulation...")
 
-results = []
+# One counter per threshold, indexed like THRESHOLDS
+counts = {
+    key: np.zeros(len(THRESHOLDS), dtype=np.int64)
+    for key in ("TP", "FP", "TN", "FN")
+}
+total_flows = 0
 
-for threshold in THRESHOLDS:
-    for _, row in df.iterrows():
+for chunk in pd.read_csv(
+    LOG_FILE,
+    usecols=required_columns,
+    chunksize=CHUNK_SIZE
+):
+    total_flows += len(chunk)
 
-        actual = row["final_label"]
-        confidence = row["confidence"]
+    actual_attack = (chunk["final_label"] == "ATTACK").to_numpy()
+    actual_benign = (chunk["final_label"] == "BENIGN").to_numpy()
 
-        predicted = (
-            "ATTACK" if confidence >= threshold else "BENIGN"
-        )
+    # (N, T) decisions for every threshold in one broadcast
+    confidence = chunk["confidence"].to_numpy(dtype=np.float64)
+    predicted_attack = confidence[:, None] >= THRESHOLD_ARR[None, :]
 
-        results.append({
-            "threshold": threshold,
-            "actual": actual,
-            "predicted": predicted
-        })
+    counts["TP"] += (predicted_attack & actual_attack[:, None]).sum(axis=0)
+    counts["FP"] += (predicted_attack & actual_benign[:, None]).sum(axis=0)
+    counts["TN"] += (~predicted_attack & actual_benign[:, None]).sum(axis=0)
+    counts["FN"] += (~predicted_attack & actual_attack[:, None]).sum(axis=0)
 
-results_df = pd.DataFrame(results)
+print(f"✔ Total flows loaded: {total_flows}")
 
 # ===============================
 # METRIC CALCULATION
@@ -97,13 +109,11 @@ summary = []
 
 print("\n📊 Calculating metrics per threshold...")
 
-for threshold in THRESHOLDS:
-    sub = results_df[results_df["threshold"] == threshold]
-
-    TP = len(sub[(sub.actual == "ATTACK") & (sub.predicted == "ATTACK")])
-    FP = len(sub[(sub.actual == "BENIGN") & (sub.predicted == "ATTACK")])
-    TN = len(sub[(sub.actual == "BENIGN") & (sub.predicted == "BENIGN")])
-    FN = len(sub[(sub.actual == "ATTACK") & (sub.predicted == "BENIGN")])
+for i, threshold in enumerate(THRESHOLDS):
+    TP = int(counts["TP"][i])
+    FP = int(counts["FP"][i])
+    TN = int(counts["TN"][i])
+    FN = int(counts["FN"][i])
 
     fpr = FP / (FP + TN + 1e-6)
     fnr = FN / (FN + TP + 1e-6)
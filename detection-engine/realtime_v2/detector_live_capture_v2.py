@@ -3,50 +3,20 @@
 # FINAL STABLE VERSION (Windows + Wi-Fi + VM Ethernet)
 # =====================================================
 
-from scapy.all import (
-    sniff, IP, IPv6, TCP, UDP, ICMP, ARP,
-    get_if_list, conf
-)
 import time
-import pandas as pd
+import json
 import argparse
 import signal
 import sys
 import os
-import requests
 import threading
+import queue
 from datetime import datetime, timezone
 
-from feature_extractor_v2 import FlowStats, REALTIME_FEATURES
-from detector_multi_model_v2 import detect_with_all_models, SCALER
-from detector_threshold_v2 import apply_threshold_and_vote
-from hybrid_controller import apply_hybrid_logic
-from detector_logger_v2 import log_detection
-from alert_manager import trigger_alert
-
-# =====================================================
-# BACKEND CONFIG
-# =====================================================
-
-BACKEND_URL = os.getenv(
-    "ML_NIDS_BACKEND_URL",
-    "http://localhost:5000/api/detections"
-)
-
-def send_to_backend(payload: dict):
-    try:
-        requests.post(
-            BACKEND_URL,
-            json=payload,
-            headers={"Content-Type": "application/json"},
-            timeout=2
-        )
-    except Exception:
-        pass
-
-
 # =====================================================
 # CLI ARGUMENTS
+# (parsed before heavy imports so --help / bad args
+#  exit without loading scapy, pandas or the models)
 # =====================================================
 
 parser = argparse.ArgumentParser(description="Realtime Hybrid ML-NIDS")
@@ -61,6 +31,16 @@ parser.add_argument("--threshold", type=float, default=0.5)
 parser.add_argument("--vote", type=int, default=3)
 parser.add_argument("--timeout", type=int, default=10)
 parser.add_argument("--run_mode", choices=["cli", "service"], default="cli")
+parser.add_argument("--queue_size", type=int, default=10000,
+                    help="Max captured packets buffered for processing")
+parser.add_argument("--cpu", type=int, default=None,
+                    help="Pin packet capture threads to this CPU core "
+                         "(Linux; elsewhere the whole process is pinned)")
+parser.add_argument("--nice", type=int, default=None,
+                    help="Process niceness (e.g. -5 for higher priority)")
+parser.add_argument("--use_pcap", action="store_true",
+                    help="Capture via libpcap/Npcap with a kernel BPF "
+                         "filter derived from --protocol")
 
 args = parser.parse_args()
 
@@ -75,6 +55,116 @@ SELECTED_MODELS = None if args.models.lower() == "all" else [
     m.strip() for m in args.models.split(",")
 ]
 
+# Flow-key protocols accepted per --protocol mode (None = all)
+ALLOWED_PROTOCOLS = {
+    "tcp": {"TCP"},
+    "udp": {"UDP"},
+    "icmp": {"ICMP"},
+    "arp": {"ARP"},
+    "both": {"TCP", "UDP"},
+}.get(PROTOCOL_MODE)
+
+# Same selection as a BPF expression, so libpcap drops
+# unwanted traffic in the kernel (None = no filter)
+BPF_FILTER = {
+    "tcp": "tcp",
+    "udp": "udp",
+    "icmp": "icmp",
+    "arp": "arp",
+    "both": "tcp or udp",
+}.get(PROTOCOL_MODE)
+
+# =====================================================
+# NATIVE THREAD POOLS (set BEFORE numpy / sklearn import)
+# Inference batches are tiny; letting OpenMP / BLAS spin
+# up a pool per call only contends with the capture thread.
+# =====================================================
+
+for _var in (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+):
+    os.environ.setdefault(_var, "1")
+
+# =====================================================
+# HEAVY IMPORTS (scapy, pandas, models)
+# =====================================================
+
+from scapy.all import (
+    AsyncSniffer, IP, IPv6, TCP, UDP, ICMP, ARP,
+    get_if_list, conf
+)
+import numpy as np
+import requests
+
+from feature_extractor_v2 import FlowStats, REALTIME_FEATURES
+from detector_multi_model_v2 import predict_all_models, SCALER
+from detector_threshold_v2 import apply_threshold_and_vote
+from hybrid_controller import apply_hybrid_logic
+from detector_logger_v2 import log_detection
+from alert_manager import trigger_alert
+
+# =====================================================
+# BACKEND CONFIG
+# =====================================================
+
+BACKEND_URL = os.getenv(
+    "ML_NIDS_BACKEND_URL",
+    "http://localhost:5000/api/detections"
+)
+
+# orjson (optional) serializes straight to bytes and handles
+# numpy scalars natively; stdlib json is the fallback
+try:
+    import orjson
+
+    def dump_payload(payload: dict) -> bytes:
+        return orjson.dumps(
+            payload, default=float, option=orjson.OPT_SERIALIZE_NUMPY
+        )
+except ImportError:
+    def dump_payload(payload: dict) -> bytes:
+        return json.dumps(
+            payload, separators=(",", ":"), default=float
+        ).encode("utf-8")
+
+
+# POSTs run on their own thread behind a bounded queue so a slow
+# or unreachable backend never stalls flow processing.
+BACKEND_QUEUE = queue.Queue(maxsize=1000)
+BACKEND_SESSION = requests.Session()
+BACKEND_SESSION.headers.update({"Content-Type": "application/json"})
+DROPPED_EVENTS = 0
+
+
+def send_to_backend(payload: dict):
+    global DROPPED_EVENTS
+    try:
+        # Serialize ONCE (compact, numpy-safe) and hand off the raw body
+        BACKEND_QUEUE.put_nowait(dump_payload(payload))
+    except queue.Full:
+        DROPPED_EVENTS += 1
+    except Exception:
+        pass
+
+
+def backend_worker():
+    """
+    Drain the backend queue over one keep-alive session.
+    """
+    while RUNNING:
+        try:
+            body = BACKEND_QUEUE.get(timeout=0.5)
+        except queue.Empty:
+            continue
+
+        try:
+            BACKEND_SESSION.post(BACKEND_URL, data=body, timeout=2)
+        except Exception:
+            pass
+
+
 # =====================================================
 # FLOW TABLE
 # =====================================================
@@ -82,6 +172,23 @@ SELECTED_MODELS = None if args.models.lower() == "all" else [
 FLOW_TABLE = {}
 RUNNING = True
 
+# Expiry sweep cadence (seconds); timeouts are whole seconds
+SWEEP_INTERVAL = 1.0
+LAST_SWEEP = 0.0
+
+# =====================================================
+# CAPTURE → PROCESSING QUEUE
+# Capture threads only enqueue; one worker thread runs
+# flow tracking + ML, so slow inference never blocks
+# the sniffer (and FLOW_TABLE has a single writer).
+# =====================================================
+
+PACKET_QUEUE = queue.Queue(maxsize=args.queue_size)
+DROPPED_PACKETS = 0
+
+# Started AsyncSniffer instances (stopped on shutdown)
+SNIFFERS = []
+
 
 # =====================================================
 # SIGNAL HANDLING
@@ -91,6 +198,15 @@ def shutdown_handler(signum, frame):
     global RUNNING
     RUNNING = False
     print("\n[INFO] Detector shutting down safely")
+    for sniffer in SNIFFERS:
+        try:
+            sniffer.stop(join=False)
+        except Exception:
+            pass
+    if DROPPED_PACKETS:
+        print(f"[WARN] Packets dropped (queue full): {DROPPED_PACKETS}")
+    if DROPPED_EVENTS:
+        print(f"[WARN] Backend events dropped (queue full): {DROPPED_EVENTS}")
     sys.exit(0)
 
 signal.signal(signal.SIGINT, shutdown_handler)
@@ -152,26 +268,36 @@ def resolve_interfaces(user_iface: str):
 # =====================================================
 
 def get_ip_layer(pkt):
-    if IP in pkt:
-        return pkt[IP]
-    if IPv6 in pkt:
-        return pkt[IPv6]
-    return None
+    ip = pkt.getlayer(IP)
+    if ip is None:
+        ip = pkt.getlayer(IPv6)
+    return ip
 
 
 def get_flow_key(pkt):
+    """
+    Build the 5-tuple flow key.
+    Each layer is looked up once with getlayer() instead of
+    an `X in pkt` test followed by pkt[X].
+    """
     ip = get_ip_layer(pkt)
     if ip is None:
         return None
 
-    if TCP in pkt:
-        return (ip.src, ip.dst, pkt[TCP].sport, pkt[TCP].dport, "TCP")
-    if UDP in pkt:
-        return (ip.src, ip.dst, pkt[UDP].sport, pkt[UDP].dport, "UDP")
-    if ICMP in pkt:
+    l4 = pkt.getlayer(TCP)
+    if l4 is not None:
+        return (ip.src, ip.dst, l4.sport, l4.dport, "TCP")
+
+    l4 = pkt.getlayer(UDP)
+    if l4 is not None:
+        return (ip.src, ip.dst, l4.sport, l4.dport, "UDP")
+
+    if pkt.getlayer(ICMP) is not None:
         return (ip.src, ip.dst, 0, 0, "ICMP")
-    if ARP in pkt:
-        return (pkt[ARP].psrc, pkt[ARP].pdst, 0, 0, "ARP")
+
+    arp = pkt.getlayer(ARP)
+    if arp is not None:
+        return (arp.psrc, arp.pdst, 0, 0, "ARP")
 
     return None
 
@@ -179,9 +305,9 @@ def get_flow_key(pkt):
 def is_forward(flow_key, pkt):
     proto = flow_key[4]
     if proto == "TCP":
-        return pkt[TCP].sport == flow_key[2]
+        return pkt.getlayer(TCP).sport == flow_key[2]
     if proto == "UDP":
-        return pkt[UDP].sport == flow_key[2]
+        return pkt.getlayer(UDP).sport == flow_key[2]
     return True
 
 
@@ -189,16 +315,19 @@ def is_forward(flow_key, pkt):
 # APPLICATION PROTOCOL DETECTION
 # =====================================================
 
+TCP_APP_PORTS = {
+    80: "HTTP",
+    443: "HTTPS",
+    22: "SSH",
+    21: "FTP"
+}
+
+
 def detect_app_protocol(flow_key):
     _, _, _, dport, proto = flow_key
 
     if proto == "TCP":
-        return {
-            80: "HTTP",
-            443: "HTTPS",
-            22: "SSH",
-            21: "FTP"
-        }.get(dport, "OTHER")
+        return TCP_APP_PORTS.get(dport, "OTHER")
 
     if proto == "UDP" and dport == 53:
         return "DNS"
@@ -210,23 +339,58 @@ def detect_app_protocol(flow_key):
 # FLOW FINALIZATION
 # =====================================================
 
-def process_flow(flow_key, flow, iface_name):
+def normalize_feature_name(name):
+    """
+    Canonical feature key: stripped + lowercase.
+    CICIDS CSV headers often carry leading spaces / odd casing.
+    """
+    return str(name).strip().lower()
 
-    features = flow.extract_features()
-    flow_duration = round(features[1], 6)
 
-    feature_df = pd.DataFrame([features], columns=REALTIME_FEATURES)
-    feature_df = feature_df[list(SCALER.feature_names_in_)]
+# Extractor order → scaler (training) order, resolved ONCE
+SCALER_COLUMNS = list(SCALER.feature_names_in_)
+_EXTRACTOR_INDEX = {
+    normalize_feature_name(c): i for i, c in enumerate(REALTIME_FEATURES)
+}
+FEATURE_ORDER = np.array(
+    [_EXTRACTOR_INDEX[normalize_feature_name(c)] for c in SCALER_COLUMNS],
+    dtype=np.intp
+)
 
-    model_results = detect_with_all_models(
-        feature_df,
-        selected_models=SELECTED_MODELS
-    )
 
-    per_model_probs = {
-        model: res["probability"]
-        for model, res in model_results.items()
-    }
+def process_flows(expired, iface_name, now):
+    """
+    Finalize a batch of expired flows at sweep time `now`
+    (capture clock, same as the per-packet updates).
+
+    All flows are scored together: one (N, F) matrix in training
+    order and ONE predict_proba call per model, instead of a
+    single-row predict per flow per model.
+    """
+    X = np.empty((len(expired), len(FEATURE_ORDER)), dtype=np.float64)
+    durations = []
+
+    for i, (_, flow) in enumerate(expired):
+        features = flow.extract_features(now)
+        durations.append(round(features[1], 6))
+        X[i] = np.asarray(features, dtype=np.float64)[FEATURE_ORDER]
+
+    batch_probs = predict_all_models(X, selected_models=SELECTED_MODELS)
+
+    # SoA: model names once + one (N, M) probability matrix;
+    # each flow's row is converted to Python floats in one call
+    model_names = list(batch_probs.keys())
+    P = np.column_stack(list(batch_probs.values()))
+
+    for i, (flow_key, _) in enumerate(expired):
+        per_model_probs = dict(zip(
+            model_names,
+            [round(p, 6) for p in P[i].tolist()]
+        ))
+        report_flow(flow_key, per_model_probs, durations[i], iface_name)
+
+
+def report_flow(flow_key, per_model_probs, flow_duration, iface_name):
 
     vote_result = apply_threshold_and_vote(
         per_model_probs,
@@ -279,51 +443,153 @@ def process_flow(flow_key, flow, iface_name):
 # PACKET HANDLER
 # =====================================================
 
-def on_packet(pkt, iface_name):
+def on_packet(pkt, iface_name, pkt_time):
+    global LAST_SWEEP
+
     if not RUNNING:
         return
 
-    if PROTOCOL_MODE != "all":
-        if PROTOCOL_MODE == "tcp" and TCP not in pkt:
-            return
-        if PROTOCOL_MODE == "udp" and UDP not in pkt:
-            return
-        if PROTOCOL_MODE == "icmp" and ICMP not in pkt:
-            return
-        if PROTOCOL_MODE == "arp" and ARP not in pkt:
-            return
-        if PROTOCOL_MODE == "both" and not (TCP in pkt or UDP in pkt):
-            return
-
     flow_key = get_flow_key(pkt)
     if flow_key is None:
         return
 
-    now = time.time()
+    # Protocol filter reuses the already-dissected flow key
+    if ALLOWED_PROTOCOLS is not None and flow_key[4] not in ALLOWED_PROTOCOLS:
+        return
+
+    # Capture time, not dequeue time: a backed-up queue must not
+    # compress inter-arrival times or stretch flow durations
+    now = pkt_time
+    pkt_len = len(pkt)
 
-    if flow_key not in FLOW_TABLE:
-        FLOW_TABLE[flow_key] = {
-            "flow": FlowStats(dst_port=flow_key[3]),
+    # Single dict probe per packet
+    entry = FLOW_TABLE.get(flow_key)
+    if entry is None:
+        entry = FLOW_TABLE[flow_key] = {
+            "flow": FlowStats(dst_port=flow_key[3], start_time=now),
             "last_seen": now
         }
-
-    entry = FLOW_TABLE[flow_key]
     entry["last_seen"] = now
+    flow = entry["flow"]
 
+    # Stats use the capture timestamp (no clock read per packet)
     if is_forward(flow_key, pkt):
-        entry["flow"].update_forward(len(pkt))
+        flow.update_forward(pkt_len, now)
     else:
-        entry["flow"].update_backward(len(pkt))
+        flow.update_backward(pkt_len, now)
 
     # Timeout-based flush (Wi-Fi safe)
+    # Full-table scan at most once per SWEEP_INTERVAL, not per packet
+    if now - LAST_SWEEP < SWEEP_INTERVAL:
+        return
+    LAST_SWEEP = now
+
     expired = [
         k for k, v in FLOW_TABLE.items()
         if now - v["last_seen"] > FLOW_TIMEOUT
     ]
 
-    for k in expired:
-        process_flow(k, FLOW_TABLE[k]["flow"], iface_name)
-        del FLOW_TABLE[k]
+    if expired:
+        process_flows(
+            [(k, FLOW_TABLE.pop(k)["flow"]) for k in expired],
+            iface_name,
+            now
+        )
+
+
+def enqueue_packet(pkt, iface_name):
+    """
+    Sniffer callback: hand the packet (with its capture
+    timestamp) to the worker, never block.
+    """
+    global DROPPED_PACKETS
+    try:
+        PACKET_QUEUE.put_nowait((pkt, float(pkt.time), iface_name))
+    except queue.Full:
+        DROPPED_PACKETS += 1
+
+
+def packet_worker():
+    """
+    Drain the capture queue and run the per-packet pipeline.
+    """
+    while RUNNING:
+        try:
+            pkt, pkt_time, iface_name = PACKET_QUEUE.get(timeout=0.5)
+        except queue.Empty:
+            continue
+
+        try:
+            on_packet(pkt, iface_name, pkt_time)
+        except Exception as e:
+            print(f"[WARN] Packet processing failed: {e}")
+
+
+# =====================================================
+# CPU AFFINITY / PRIORITY (reduces sniff drops)
+# =====================================================
+
+def pin_current_thread(cpu):
+    """
+    Pin the calling thread to one core (Linux: affinity of
+    pid 0 applies to the calling thread only).
+    """
+    try:
+        os.sched_setaffinity(0, {cpu})
+        print(f"[INFO] Capture thread pinned to CPU core {cpu}")
+    except Exception as e:
+        print(f"[WARN] CPU pinning unavailable: {e}")
+
+
+def apply_cpu_tuning(cpu, nice):
+    """
+    Process-wide tuning, run before any threads start.
+    --cpu is applied per capture thread on Linux (see
+    make_capture_callback); other platforms have no per-thread
+    API, so the whole process is pinned there.
+    """
+    if cpu is not None and not hasattr(os, "sched_setaffinity"):
+        try:
+            import psutil
+            psutil.Process().cpu_affinity([cpu])
+            print(f"[INFO] Whole process pinned to CPU core {cpu}")
+        except Exception as e:
+            print(f"[WARN] CPU pinning unavailable: {e}")
+
+    if nice is not None:
+        try:
+            if hasattr(os, "nice"):
+                os.nice(nice)
+            else:
+                import psutil
+                if nice < 0:
+                    priority = psutil.HIGH_PRIORITY_CLASS
+                elif nice > 0:
+                    priority = psutil.BELOW_NORMAL_PRIORITY_CLASS
+                else:
+                    priority = psutil.NORMAL_PRIORITY_CLASS
+                psutil.Process().nice(priority)
+            print(f"[INFO] Process priority adjusted (nice={nice})")
+        except Exception as e:
+            print(f"[WARN] Priority change unavailable: {e}")
+
+
+def make_capture_callback(iface_name, cpu=None):
+    """
+    Sniffer prn for one interface. With --cpu on Linux the
+    capture thread pins itself on its first packet, leaving the
+    packet and backend workers free to use other cores.
+    """
+    pin_pending = cpu is not None and hasattr(os, "sched_setaffinity")
+
+    def callback(pkt):
+        nonlocal pin_pending
+        if pin_pending:
+            pin_pending = False
+            pin_current_thread(cpu)
+        enqueue_packet(pkt, iface_name)
+
+    return callback
 
 
 # =====================================================
@@ -343,16 +609,27 @@ if __name__ == "__main__":
     print(f"[INFO] Scapy Interfaces={interfaces}")
     print("-" * 60)
 
+    apply_cpu_tuning(args.cpu, args.nice)
+
+    sniff_kwargs = {}
+    if args.use_pcap:
+        conf.use_pcap = True
+        if BPF_FILTER:
+            sniff_kwargs["filter"] = BPF_FILTER
+        print(f"[INFO] libpcap capture | BPF filter={BPF_FILTER or 'none'}")
+
+    threading.Thread(target=packet_worker, daemon=True).start()
+    threading.Thread(target=backend_worker, daemon=True).start()
+
     for iface in interfaces:
-        threading.Thread(
-            target=sniff,
-            kwargs={
-                "iface": iface,
-                "prn": lambda pkt, i=iface: on_packet(pkt, i),
-                "store": False
-            },
-            daemon=True
-        ).start()
+        sniffer = AsyncSniffer(
+            iface=iface,
+            prn=make_capture_callback(iface, args.cpu),
+            store=False,
+            **sniff_kwargs
+        )
+        sniffer.start()
+        SNIFFERS.append(sniffer)
 
     while RUNNING:
         time.sleep(1)
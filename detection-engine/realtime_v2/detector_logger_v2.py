@@ -3,9 +3,11 @@
 # Thread-safe CSV logger for ML-NIDS
 # =====================================================
 
+import atexit
 import csv
 import os
 import threading
+import time
 
 # ===============================
 # PATH CONFIG (SAFE)
@@ -51,17 +53,73 @@ CSV_HEADER = [
 # Thread lock for realtime sniffing
 _lock = threading.Lock()
 
+# Rows are batched in memory and written with one writerows()
+# call every FLUSH_EVERY rows, and by the background flusher
+# every FLUSH_INTERVAL seconds
+FLUSH_EVERY = 256
+FLUSH_INTERVAL = 1.0
+
 # ===============================
 # INITIALIZE LOG FILE
+# (opened ONCE, kept open for the process lifetime)
 # ===============================
 
 def _initialize_log_file():
-    if not os.path.exists(LOG_FILE):
-        with open(LOG_FILE, mode="w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(CSV_HEADER)
+    write_header = not os.path.exists(LOG_FILE)
+
+    f = open(
+        LOG_FILE, mode="a", newline="", encoding="utf-8",
+        buffering=1 << 16
+    )
+    writer = csv.writer(f)
+
+    if write_header:
+        writer.writerow(CSV_HEADER)
+        f.flush()
+
+    return f, writer
+
+_log_fh, _writer = _initialize_log_file()
+_row_buffer = []
+
+
+def _flush_rows():
+    """
+    Write batched rows and flush the file (caller holds _lock)
+    """
+    if _row_buffer:
+        _writer.writerows(_row_buffer)
+        _row_buffer.clear()
+    _log_fh.flush()
+
+
+def close_log():
+    """
+    Flush buffered rows and close the log file (runs at exit)
+    """
+    with _lock:
+        if not _log_fh.closed:
+            _flush_rows()
+            _log_fh.close()
+
+atexit.register(close_log)
 
-_initialize_log_file()
+
+def _periodic_flush():
+    """
+    Background flusher: pending rows reach disk within
+    FLUSH_INTERVAL even if no further detection arrives.
+    atexit does not run when the process is force-killed
+    (e.g. the dashboard Stop on Windows).
+    """
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        with _lock:
+            if _log_fh.closed:
+                return
+            _flush_rows()
+
+threading.Thread(target=_periodic_flush, daemon=True).start()
 
 # ===============================
 # MAIN LOGGER FUNCTION
@@ -93,32 +151,36 @@ def log_detection(payload: dict):
     """
 
     with _lock:
-        with open(LOG_FILE, mode="a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
+        if _log_fh.closed:
+            return
+
+        _row_buffer.append([
+            payload.get("timestamp"),
 
-            writer.writerow([
-                payload.get("timestamp"),
+            payload.get("sourceIP"),
+            payload.get("destinationIP"),
+            payload.get("srcPort"),
+            payload.get("dstPort"),
+            payload.get("protocol"),
 
-                payload.get("sourceIP"),
-                payload.get("destinationIP"),
-                payload.get("srcPort"),
-                payload.get("dstPort"),
-                payload.get("protocol"),
+            payload.get("finalLabel"),
+            round(payload.get("confidence", 0.0), 6),
 
-                payload.get("finalLabel"),
-                round(payload.get("confidence", 0.0), 6),
+            payload.get("attackVotes"),
+            payload.get("totalModels"),
+            payload.get("threshold"),
+            payload.get("voteK"),
+            payload.get("aggMethod"),
 
-                payload.get("attackVotes"),
-                payload.get("totalModels"),
-                payload.get("threshold"),
-                payload.get("voteK"),
-                payload.get("aggMethod"),
+            payload.get("hybridLabel"),
+            payload.get("severity"),
+            payload.get("hybridReason"),
 
-                payload.get("hybridLabel"),
-                payload.get("severity"),
-                payload.get("hybridReason"),
+            payload.get("flowDuration"),
 
-                payload.get("flowDuration"),
+            str(payload.get("modelProbabilities"))
+        ])
 
-                str(payload.get("modelProbabilities"))
-            ])
+        # Time-based flushing is handled by _periodic_flush
+        if len(_row_buffer) >= FLUSH_EVERY:
+            _flush_rows()
@@ -3,7 +3,11 @@
 # STEP-3: ML ONLY (No voting, no hybrid, no logging)
 # =====================================================
 
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
+from sklearn.preprocessing import StandardScaler
 from model_loader_v2 import load_all_models_and_scaler
 
 # -----------------------------------------------------
@@ -11,6 +15,77 @@ from model_loader_v2 import load_all_models_and_scaler
 # -----------------------------------------------------
 MODELS, SCALER = load_all_models_and_scaler()
 
+# -----------------------------------------------------
+# SINGLE-THREADED PREDICT (set ONCE after load)
+# Models were trained with n_jobs=-1; on a few rows per
+# sweep, spinning up a worker pool costs more than it saves.
+# -----------------------------------------------------
+for _model in MODELS.values():
+    try:
+        if _model.get_params().get("n_jobs") not in (None, 1):
+            _model.set_params(n_jobs=1)
+    except Exception:
+        pass
+
+# -----------------------------------------------------
+# PRECOMPUTED SCALER PARAMS (skip sklearn per-call checks)
+# -----------------------------------------------------
+if (
+    isinstance(SCALER, StandardScaler)
+    and SCALER.with_mean and SCALER.with_std
+):
+    SCALER_MEAN = np.asarray(SCALER.mean_, dtype=np.float64)
+    SCALER_SCALE = np.asarray(SCALER.scale_, dtype=np.float64)
+else:
+    SCALER_MEAN = SCALER_SCALE = None
+
+# -----------------------------------------------------
+# INPUT TYPE PER MODEL (decided ONCE at load)
+# Models fitted on a DataFrame need named columns;
+# the rest take the scaled ndarray directly.
+# -----------------------------------------------------
+MODELS_NEED_NAMES = {
+    name for name, model in MODELS.items()
+    if hasattr(model, "feature_names_in_")
+}
+print("[INFO] Models using named (DataFrame) input:",
+      sorted(MODELS_NEED_NAMES))
+
+# -----------------------------------------------------
+# BOUND predict_proba PER MODEL (resolved ONCE)
+# Skips the attribute / available_if descriptor lookup
+# on every call; loader already guarantees it exists.
+# -----------------------------------------------------
+PREDICT_PROBA = {
+    name: model.predict_proba for name, model in MODELS.items()
+}
+
+
+def scale_features(X):
+    """
+    Apply the fitted scaler to a feature matrix.
+
+    StandardScaler is applied inline as (X - mean) / scale, which gives
+    the same values as SCALER.transform without sklearn's input
+    validation and feature-name checks. Other scaler types fall back
+    to SCALER.transform.
+    """
+    if SCALER_MEAN is None:
+        if not isinstance(X, pd.DataFrame) and hasattr(SCALER, "feature_names_in_"):
+            X = pd.DataFrame(X, columns=SCALER.feature_names_in_)
+        return SCALER.transform(X)
+
+    # DataFrames are aligned by name first (as transform() would
+    # enforce); a plain ndarray must already be in training order
+    if hasattr(X, "columns") and hasattr(SCALER, "feature_names_in_"):
+        X = X[list(SCALER.feature_names_in_)]
+
+    # One output buffer: subtract into it, divide in place
+    X = np.asarray(X, dtype=np.float64)
+    out = np.subtract(X, SCALER_MEAN)
+    np.divide(out, SCALER_SCALE, out=out)
+    return out
+
 # -----------------------------------------------------
 # MODEL NAME NORMALIZATION (CRITICAL FIX)
 # -----------------------------------------------------
@@ -40,61 +115,108 @@ MODEL_ALIAS_MAP = {
 }
 
 
-def detect_with_all_models(features_df, selected_models=None):
+@lru_cache(maxsize=16)
+def resolve_models(selected_models=None):
     """
-    Run inference using multiple ML models on realtime features
+    Normalize requested model names to loaded MODELS keys.
+
+    Cached per selection, so alias lookups (and the WARN for
+    unavailable models) happen once instead of on every call.
+
+    Args:
+        selected_models (tuple | None): Requested names (default = all)
+
+    Returns:
+        tuple: Loaded model names to run
+    """
+    if not selected_models:
+        return tuple(MODELS.keys())
+
+    models_to_use = []
+    for m in selected_models:
+        normalized = MODEL_ALIAS_MAP.get(m.lower(), m)
+        if normalized in MODELS:
+            models_to_use.append(normalized)
+        else:
+            print(f"[WARN] Model not available: {m}")
+
+    return tuple(models_to_use)
+
+
+def predict_all_models(features, selected_models=None):
+    """
+    Batched inference: ONE predict_proba call per model for N rows
 
     Args:
-        features_df (pd.DataFrame): Single-row feature dataframe
+        features (pd.DataFrame | np.ndarray): (N, F) features,
+            columns in SCALER.feature_names_in_ order
         selected_models (list | None): Models to run (default = all)
 
     Returns:
-        dict: Per-model probability & label
+        dict: {model_name: np.ndarray of attack probabilities, shape (N,)}
     """
 
-    results = {}
+    probs = {}
 
     # -------------------------------------------------
-    # Decide which models to use (NORMALIZED)
+    # Decide which models to use (NORMALIZED, cached)
     # -------------------------------------------------
-    if selected_models:
-        models_to_use = []
-        for m in selected_models:
-            normalized = MODEL_ALIAS_MAP.get(m.lower(), m)
-            if normalized in MODELS:
-                models_to_use.append(normalized)
-            else:
-                print(f"[WARN] Model not available: {m}")
-    else:
-        models_to_use = list(MODELS.keys())
+    models_to_use = resolve_models(
+        tuple(selected_models) if selected_models else None
+    )
 
     # -------------------------------------------------
     # Scale features ONCE
     # -------------------------------------------------
-    X_scaled = SCALER.transform(features_df)
+    X_scaled = scale_features(features)
 
     # ✅ RESTORE FEATURE NAMES (CRITICAL FIX)
-    X_scaled_df = pd.DataFrame(
-        X_scaled,
-        columns=SCALER.feature_names_in_
-    )
+    # Only built when a selected model was fitted with names
+    X_scaled_df = None
+    if MODELS_NEED_NAMES.intersection(models_to_use):
+        X_scaled_df = pd.DataFrame(
+            X_scaled,
+            columns=SCALER.feature_names_in_
+        )
 
     # -------------------------------------------------
-    # Run inference
+    # Run inference (whole batch per model)
     # -------------------------------------------------
     for model_name in models_to_use:
-        model = MODELS.get(model_name)
-        if model is None:
+        predict_proba = PREDICT_PROBA.get(model_name)
+        if predict_proba is None:
             continue
 
         # ✅ Decide input type per model
-        if hasattr(model, "feature_names_in_"):
+        if model_name in MODELS_NEED_NAMES:
             X_input = X_scaled_df      # Tree / LGB / RF / GB
         else:
             X_input = X_scaled         # MLP / sklearn NN
 
-        prob_attack = model.predict_proba(X_input)[0][1]
-        prob_attack = round(float(prob_attack), 6)
+        probs[model_name] = predict_proba(X_input)[:, 1]
+
+    return probs
+
+
+def detect_with_all_models(features_df, selected_models=None):
+    """
+    Run inference using multiple ML models on realtime features
+
+    Args:
+        features_df (pd.DataFrame | np.ndarray): Single-row features,
+            columns in SCALER.feature_names_in_ order
+        selected_models (list | None): Models to run (default = all)
+
+    Returns:
+        dict: Per-model probability & label
+    """
+
+    results = {}
+
+    for model_name, model_probs in predict_all_models(
+        features_df, selected_models
+    ).items():
+        prob_attack = round(float(model_probs[0]), 6)
 
         label = "ATTACK" if prob_attack >= 0.5 else "BENIGN"
 
@@ -103,5 +225,4 @@ def detect_with_all_models(features_df, selected_models=None):
             "label": label
         }
 
-
     return results
@@ -4,8 +4,8 @@
 # Features are LOCKED to offline training schema
 # =====================================================
 
+import math
 import time
-import numpy as np
 
 
 # =====================================================
@@ -33,11 +33,11 @@ class FlowStats:
     and extracts CICIDS2018-compatible realtime features.
     """
 
-    def __init__(self, dst_port: int):
+    def __init__(self, dst_port: int, start_time: float = None):
         self.dst_port = dst_port
 
-        # Timing
-        self.start_time = time.time()
+        # Timing (first packet's capture time when known)
+        self.start_time = time.time() if start_time is None else start_time
         self.last_seen = self.start_time
         self.last_fwd_time = None
 
@@ -45,67 +45,111 @@ class FlowStats:
         self.fwd_packets = 0
         self.bwd_packets = 0
 
-        # Packet lengths
-        self.fwd_lengths = []
-        self.bwd_lengths = []
+        # Packet lengths (running totals, O(1) memory per flow)
+        self.total_fwd_len = 0
+        self.total_bwd_len = 0
+        self.fwd_len_min = None
 
-        # Inter-arrival times
-        self.flow_iats = []
-        self.fwd_iats = []
+        # All-packet length variance (Welford)
+        self.len_count = 0
+        self.len_mean = 0.0
+        self.len_m2 = 0.0
+
+        # Inter-arrival times (running sums)
+        self.flow_iat_sum = 0.0
+        self.flow_iat_count = 0
+        self.fwd_iat_sum = 0.0
+        self.fwd_iat_count = 0
+
+    # --------------------------------------------------
+    # Shared length / IAT bookkeeping
+    # --------------------------------------------------
+    def _add_length(self, pkt_len: int):
+        self.len_count += 1
+        delta = pkt_len - self.len_mean
+        self.len_mean += delta / self.len_count
+        self.len_m2 += delta * (pkt_len - self.len_mean)
+
+    def _add_flow_iat(self, now: float):
+        self.flow_iat_sum += now - self.last_seen
+        self.flow_iat_count += 1
+        self.last_seen = now
 
     # --------------------------------------------------
     # Forward packet update
     # --------------------------------------------------
-    def update_forward(self, pkt_len: int):
-        now = time.time()
+    def update_forward(self, pkt_len: int, now: float = None):
+        if now is None:
+            now = time.time()
 
         # Flow IAT
-        self.flow_iats.append(now - self.last_seen)
-        self.last_seen = now
+        self._add_flow_iat(now)
 
         # Forward IAT
         if self.last_fwd_time is not None:
-            self.fwd_iats.append(now - self.last_fwd_time)
+            self.fwd_iat_sum += now - self.last_fwd_time
+            self.fwd_iat_count += 1
         self.last_fwd_time = now
 
         self.fwd_packets += 1
-        self.fwd_lengths.append(pkt_len)
+        self.total_fwd_len += pkt_len
+        if self.fwd_len_min is None or pkt_len < self.fwd_len_min:
+            self.fwd_len_min = pkt_len
+        self._add_length(pkt_len)
 
     # --------------------------------------------------
     # Backward packet update
     # --------------------------------------------------
-    def update_backward(self, pkt_len: int):
-        now = time.time()
+    def update_backward(self, pkt_len: int, now: float = None):
+        if now is None:
+            now = time.time()
 
         # Flow IAT
-        self.flow_iats.append(now - self.last_seen)
-        self.last_seen = now
+        self._add_flow_iat(now)
 
         self.bwd_packets += 1
-        self.bwd_lengths.append(pkt_len)
+        self.total_bwd_len += pkt_len
+        self._add_length(pkt_len)
 
     # --------------------------------------------------
     # Feature extraction (LOCKED ORDER)
     # --------------------------------------------------
-    def extract_features(self):
+    def extract_features(self, now: float = None):
         """
         Returns feature vector in EXACT order used during
         offline training and scaler fitting.
+
+        `now` is the flow end time on the same clock as the packet
+        updates (capture time); defaults to time.time().
         """
+        if now is None:
+            now = time.time()
 
-        flow_duration = max(time.time() - self.start_time, 1e-6)
+        flow_duration = max(now - self.start_time, 1e-6)
 
-        total_fwd_len = sum(self.fwd_lengths)
-        total_bwd_len = sum(self.bwd_lengths)
+        total_fwd_len = self.total_fwd_len
+        total_bwd_len = self.total_bwd_len
 
-        fwd_len_min = min(self.fwd_lengths) if self.fwd_lengths else 0
-        fwd_len_mean = np.mean(self.fwd_lengths) if self.fwd_lengths else 0
+        fwd_len_min = self.fwd_len_min if self.fwd_packets else 0
+        fwd_len_mean = (
+            total_fwd_len / self.fwd_packets
+            if self.fwd_packets else 0
+        )
 
-        all_lengths = self.fwd_lengths + self.bwd_lengths
-        pkt_len_std = np.std(all_lengths) if all_lengths else 0
+        # Population std (ddof=0), same as np.std
+        pkt_len_std = (
+            math.sqrt(self.len_m2 / self.len_count)
+            if self.len_count else 0
+        )
 
-        flow_iat_mean = np.mean(self.flow_iats) if self.flow_iats else 0
-        fwd_iat_mean = np.mean(self.fwd_iats) if self.fwd_iats else 0
+        flow_iat_mean = (
+            self.flow_iat_sum / self.flow_iat_count
+            if self.flow_iat_count else 0
+        )
+        fwd_iat_mean = (
+            self.fwd_iat_sum / self.fwd_iat_count
+            if self.fwd_iat_count else 0
+        )
 
         down_up_ratio = (
             self.bwd_packets / self.fwd_packets
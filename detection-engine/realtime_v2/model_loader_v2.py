@@ -5,6 +5,7 @@
 import os
 import json
 import joblib
+from functools import lru_cache
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -15,6 +16,56 @@ MODELS_BASE_DIR = os.path.join(
 METADATA_FILE = os.path.join(MODELS_BASE_DIR, "model_metadata.json")
 SCALER_FILE = os.path.join(MODELS_BASE_DIR, "scaler_v2.pkl")
 
+# Bundles are saved uncompressed by joblib.dump, so their numpy
+# arrays can be memory-mapped read-only instead of copied.
+# Only KNN benefits (it keeps its full training sample matrix);
+# tree ensembles copy their node tables on unpickle and the MLP
+# weights are tiny.
+# NOTE (all platforms): the mapped file must not be rewritten in
+# place while the detector runs -- on Linux truncating it can crash
+# the detector (SIGBUS) or feed it the new samples; on Windows the
+# write fails. split_train_evaluate_v2 writes to a temp file and
+# os.replace()s it (safe on Linux); on Windows stop the detector
+# before retraining.
+MMAP_MODE = "r"
+MMAP_MODELS = {"KNN"}
+
+
+def _mmap_mode_for(model_file: str):
+    """
+    mmap_mode for joblib.load: MMAP_MODE for MMAP_MODELS, else None
+    """
+    model_name = os.path.splitext(model_file)[0]
+    if model_name.endswith("_v2"):
+        model_name = model_name[:-3]
+    return MMAP_MODE if model_name in MMAP_MODELS else None
+
+
+# ==================================================
+# MODEL FILE LOOKUP (directory scanned ONCE)
+# ==================================================
+
+@lru_cache(maxsize=1)
+def _list_model_files():
+    """
+    Files in MODELS_BASE_DIR from a single scandir call,
+    keyed by lowercase name (Windows paths are case-insensitive).
+    """
+    if not os.path.isdir(MODELS_BASE_DIR):
+        return {}
+
+    with os.scandir(MODELS_BASE_DIR) as entries:
+        return {e.name.lower(): e.path for e in entries if e.is_file()}
+
+
+@lru_cache(maxsize=32)
+def find_model_path(model_file: str):
+    """
+    Resolve a model file name to its full path.
+    Returns None when the file is not present in MODELS_BASE_DIR.
+    """
+    return _list_model_files().get(model_file.lower())
+
 
 # ==================================================
 # MODE 1: Load BEST model (metadata driven)
@@ -30,12 +81,12 @@ def load_model_and_scaler():
         metadata = json.load(f)
 
     model_file = metadata["selected_model"]
-    model_path = os.path.join(MODELS_BASE_DIR, model_file)
+    model_path = find_model_path(model_file)
 
-    if not os.path.exists(model_path):
+    if model_path is None:
         raise FileNotFoundError(f"[ERROR] Model not found: {model_file}")
 
-    model = joblib.load(model_path)
+    model = joblib.load(model_path, mmap_mode=_mmap_mode_for(model_file))
     scaler = joblib.load(SCALER_FILE)
 
     print("[INFO] Model & scaler loaded successfully")
@@ -65,13 +116,13 @@ def load_all_models_and_scaler():
 
     for model_name in evaluated_models.keys():
         model_file = f"{model_name}_v2.pkl"
-        model_path = os.path.join(MODELS_BASE_DIR, model_file)
+        model_path = find_model_path(model_file)
 
-        if not os.path.exists(model_path):
+        if model_path is None:
             print("[WARN] Skipping missing model:", model_file)
             continue
 
-        model = joblib.load(model_path)
+        model = joblib.load(model_path, mmap_mode=_mmap_mode_for(model_file))
 
         if not hasattr(model, "predict_proba"):
             print("[WARN] Skipping non-probabilistic model:", model_name)
@@ -19,11 +19,20 @@ def ensemble_comparison(df: pd.DataFrame, noise_conf_threshold: float = 0.6) ->
 
     total_rows = len(df)
 
-    for _, row in df.iterrows():
-        probs = row.get("modelProbabilities", {})
-        confidence = row.get("confidence")
-        final_label = row.get("finalLabel")
+    probs_col = (
+        df["modelProbabilities"] if "modelProbabilities" in df
+        else [{}] * total_rows
+    )
+    conf_col = df["confidence"] if "confidence" in df else [None] * total_rows
+    label_col = df["finalLabel"] if "finalLabel" in df else [None] * total_rows
+    threshold_col = (
+        df["threshold"] if "threshold" in df else [0.5] * total_rows
+    )
 
+    # zip over columns: avoids building a Series per row (iterrows)
+    for probs, confidence, final_label, threshold in zip(
+        probs_col, conf_col, label_col, threshold_col
+    ):
         if not probs or confidence is None:
             continue
 
@@ -35,8 +44,6 @@ def ensemble_comparison(df: pd.DataFrame, noise_conf_threshold: float = 0.6) ->
         ensemble_confidence.append(confidence)
 
         # ---------- Threshold Handling ----------
-        threshold = row.get("threshold", 0.5)
-
         dominant_model = max(probs, key=probs.get)
         dominant_vote = (
             "ATTACK"
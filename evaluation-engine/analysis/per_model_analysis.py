@@ -25,10 +25,14 @@ def per_model_analysis(
     near_threshold_count = 0
     total_predictions = 0
 
-    for _, row in df.iterrows():
-        probs = row.get("modelProbabilities", {})
-        confidence = row.get("confidence")
+    probs_col = (
+        df["modelProbabilities"] if "modelProbabilities" in df
+        else [{}] * len(df)
+    )
+    conf_col = df["confidence"] if "confidence" in df else [None] * len(df)
 
+    # zip over columns: avoids building a Series per row (iterrows)
+    for probs, confidence in zip(probs_col, conf_col):
         if not probs:
             continue
 
@@ -17,6 +17,11 @@ from datetime import datetime
 import pandas as pd
 import matplotlib.pyplot as plt
 
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
 def ensure_dir(p):
     d = os.path.dirname(p)
     if d and not os.path.exists(d):
@@ -28,7 +33,11 @@ def parse_per_model(col):
         return {}
     try:
         if isinstance(col, str):
-            return json.loads(col)
+            # Python dict repr (the detector logs str(dict)):
+            # fix quotes up front instead of via a failed parse
+            if col.startswith("{'"):
+                col = col.replace("'", '"')
+            return json_loads(col)
         elif isinstance(col, dict):
             return col
     except Exception:
@@ -50,16 +59,11 @@ def main(csv_path, out_dir):
     if ts_col is None:
         raise SystemExit("No timestamp column found in CSV. Expected column named 'timestamp'")
 
-    # parse timestamps
-    def to_dt(v):
-        try:
-            return pd.to_datetime(v)
-        except Exception:
-            try:
-                return pd.to_datetime(str(v))
-            except Exception:
-                return pd.NaT
-    df["ts_dt"] = df[ts_col].apply(to_dt)
+    # parse timestamps (one vectorized call; format inferred per
+    # element, unparseable values -> NaT and dropped below)
+    df["ts_dt"] = pd.to_datetime(
+        df[ts_col].astype(str), format="mixed", errors="coerce"
+    )
     df = df.dropna(subset=["ts_dt"]).reset_index(drop=True)
 
     # aggregated probability
@@ -91,11 +95,10 @@ def main(csv_path, out_dir):
 
     per_model_df = None
     if per_model_col:
-        # expand JSON dict column into dataframe
-        expanded = df[per_model_col].apply(parse_per_model)
-        per_model_df = pd.DataFrame(list(expanded))
-        # align index
-        per_model_df.index = df.index
+        # expand JSON dict column into dataframe in one pass
+        # (plain list, no per-row Series from .apply)
+        expanded = [parse_per_model(v) for v in df[per_model_col].tolist()]
+        per_model_df = pd.DataFrame.from_records(expanded, index=df.index)
 
     # Prepare out_dir
     ensure_dir(out_dir)
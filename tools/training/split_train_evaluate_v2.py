@@ -45,6 +45,18 @@ os.makedirs("results", exist_ok=True)
 os.makedirs(MODEL_DIR, exist_ok=True)
 # ---------------------------------------
 
+
+def dump_atomic(obj, path):
+    """
+    joblib.dump to a temp file, then os.replace() it into place.
+    A running detector that memory-maps the old bundle keeps its
+    (unlinked) file instead of seeing it truncated mid-read.
+    """
+    tmp_path = path + ".tmp"
+    joblib.dump(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+
 print("📥 Loading dataset...")
 df = pd.read_csv(DATA_FILE)
 
@@ -67,7 +79,7 @@ scaler = StandardScaler()
 X_train_scaled = scaler.fit_transform(X_train)   # fit ONLY on train
 X_test_scaled = scaler.transform(X_test)
 
-joblib.dump(scaler, f"{MODEL_DIR}/scaler_v2.pkl")
+dump_atomic(scaler, f"{MODEL_DIR}/scaler_v2.pkl")
 print("💾 Scaler saved")
 
 # ---------------- MODELS (NO SVM) ----------------
@@ -136,14 +148,16 @@ for model_name, model in models.items():
 
         model.fit(X_sub, y_sub)
 
-        # Predictions
-        y_pred = model.predict(X_test_scaled)
-
-        # ROC–AUC (probability-based)
+        # Predictions + ROC–AUC (probability-based)
+        # Single pass: labels are the argmax of predict_proba, which
+        # is what predict() computes for every model in this list
         if hasattr(model, "predict_proba"):
-            y_proba = model.predict_proba(X_test_scaled)[:, 1]
+            proba = model.predict_proba(X_test_scaled)
+            y_pred = model.classes_[np.argmax(proba, axis=1)]
+            y_proba = proba[:, 1]
             roc_auc = roc_auc_score(y_test, y_proba)
         else:
+            y_pred = model.predict(X_test_scaled)
             roc_auc = None
 
         results[model_name][f"{int(frac*100)}%"] = {
@@ -155,7 +169,7 @@ for model_name, model in models.items():
         }
 
     # Save model trained on 100% TRAIN
-    joblib.dump(model, f"{MODEL_DIR}/{model_name}_v2.pkl")
+    dump_atomic(model, f"{MODEL_DIR}/{model_name}_v2.pkl")
 
 
 # ---------------- SAVE RESULTS ----------------
@@ -49,7 +49,12 @@ REALTIME_FEATURES = [
 ]
 
 print("📥 Loading CICIDS-2018 V2 dataset...")
-df = pd.read_csv(DATASET, low_memory=False)
+# Parse only the realtime schema + label (skips unused CICIDS columns)
+df = pd.read_csv(
+    DATASET,
+    usecols=REALTIME_FEATURES + ["Label"],
+    low_memory=False
+)
 
 # -------------------------------
 # FEATURE SELECTION